@@ -9,11 +9,15 @@ This task:
 """
 
 import cothread
+import inspect
+import logging
+from collections import deque
 from typing import Any
 from task_base import TaskBase
+from enable_event import EnableEventMixin
 
 
-class CheckMotorMovement(TaskBase):
+class CheckMotorMovement(EnableEventMixin, TaskBase):
     """Task for monitoring motors using Ophyd devices."""
     
     def initialize(self):
@@ -24,6 +28,10 @@ class CheckMotorMovement(TaskBase):
         self.update_rate = self.parameters.get('update_rate', 1.0)
         self.motors_list = self.parameters.get('motors', [])
         self.switchoff_names = self.parameters.get('switchoff', [])
+        self.callback_min_interval = self.parameters.get('callback_min_interval', 0.5)
+        self._period = 1.0 / float(self.update_rate)
+        self.init_enable_event()
+        self._pv_enable = self.pvs['ENABLE']
         # Get motor devices from Ophyd devices
         self.motors = {}
         self.switches={}
@@ -60,29 +68,122 @@ class CheckMotorMovement(TaskBase):
         for motor_name in self.motors.keys():
             self.previous_moving_state[motor_name] = False
         
+        # Readback callback coalescing: last handled callback time per motor,
+        # and whether the next movement should set the switchoff devices
+        self._last_cb_ts = {motor_name: 0.0 for motor_name in self.motors}
+        self._switch_armed = {motor_name: True for motor_name in self.motors}
+        
+        # Readback updates queued by the CA thread for the task cothread
+        self._moved_q = deque()
+        self._moved_drain_pending = False
+        
+        # Resolve moving/position accessors and PV names once per motor
+        self._motor_accessors = {}
+        self._motor_pv_names = {}
+        for motor_name, motor in self.motors.items():
+            self._motor_accessors[motor_name] = self._make_accessors(motor)
+            self._motor_pv_names[motor_name] = (f"{motor_name}_POS", f"{motor_name}_MOVING")
+        
+        # Last value written to each PV, to skip no-op writes
+        self._last_pv_values = {}
+        
         self.logger.info(f"Initialized with {len(self.motors)} motors")
     
+    @staticmethod
+    def _attr_kind(motor, name: str) -> str:
+        """
+        Classify motor.<name> as 'missing', 'method' or 'value' without reading it.
+        
+        Properties are not evaluated: on Ophyd motors they perform a CA read,
+        which fails on a disconnected device.
+        """
+        try:
+            static = inspect.getattr_static(motor, name)
+        except AttributeError:
+            return 'missing'
+        if not isinstance(static, property) and callable(static):
+            return 'method'
+        return 'value'
+    
+    @classmethod
+    def _make_accessors(cls, motor):
+        """Return (get_moving, get_position) callables for a motor device."""
+        # moving may be a property (standard Ophyd) or a method (custom TML motor);
+        # properties are read lazily so errors surface in _monitor_motors
+        kind = cls._attr_kind(motor, 'moving')
+        if kind == 'method':
+            get_moving = getattr(motor, 'moving')
+        elif kind == 'value':
+            get_moving = lambda: bool(motor.moving)
+        else:
+            get_moving = lambda: False
+        
+        # position may be a property or a method
+        kind = cls._attr_kind(motor, 'position')
+        if kind == 'method':
+            get_position = getattr(motor, 'position')
+        elif kind == 'value':
+            get_position = lambda: motor.position
+        else:
+            # Fallback to user_readback if available
+            rb = getattr(motor, 'user_readback', None)
+            
+            def get_position():
+                try:
+                    return rb.get() if rb is not None else None
+                except Exception:
+                    return None
+        
+        return get_moving, get_position
+    
     def motor_moved_callback(self, motor_name: str, position: Any):
         """Normalized motor movement callback: called with motor name and new position."""
         if self.get_cycle() > 10:
-            self.logger.info(f"Motor {motor_name} moved to position {position}")
-            if not self.get_pv('ENABLE'):
+            # Drop updates arriving faster than callback_min_interval, unless
+            # the switchoff devices still have to be set for this movement
+            armed = self._switch_armed[motor_name]
+            now = cothread.GetTime()
+            if not armed and now - self._last_cb_ts[motor_name] < self.callback_min_interval:
                 return
-            # Set switchoff devices to 0 (CLOSE) upon motor movement
+            self._last_cb_ts[motor_name] = now
+            
+            self.logger.info("Motor %s moved to position %s", motor_name, position)
+            if not self._pv_enable.get() or not armed:
+                return
+            # Set switchoff devices to 0 (CLOSE) once per movement; re-armed
+            # by _monitor_motors when the motor is seen stopped
+            all_set = True
             for sw_name, sw in self.switches.items():
                 try:
                     sw.set(0)
-                    self.logger.info(f"Switchoff device {sw_name} set to 0 (CLOSE) due to motor movement.")
+                    self.logger.info("Switchoff device %s set to 0 (CLOSE) due to motor movement.", sw_name)
                 except Exception as e:
+                    all_set = False
                     self.logger.error(f"Error setting switchoff device {sw_name}: {e}")
+            # Retry on the next update if any device could not be set
+            self._switch_armed[motor_name] = not all_set
 
 
     def make_user_readback_callback(self, motor_name: str):
         """Adapter: map user_readback (timestamp, value, **kwargs) to motor_moved_callback."""
         def callback(timestamp=None, value=None, **kwargs):
-            # Forward just the value (position) along with the motor name
-            self.motor_moved_callback(motor_name, value)
+            # Runs on the CA thread: only queue the position and hand the
+            # handling over to the cothread scheduler
+            self._moved_q.append((motor_name, value))
+            if not self._moved_drain_pending:
+                self._moved_drain_pending = True
+                cothread.Callback(self._drain_moved)
         return callback
+    
+    def _drain_moved(self):
+        """Handle queued readback updates on the cothread, latest position per motor."""
+        self._moved_drain_pending = False
+        latest = {}
+        while self._moved_q:
+            motor_name, value = self._moved_q.popleft()
+            latest[motor_name] = value
+        for motor_name, value in latest.items():
+            self.motor_moved_callback(motor_name, value)
 
     def run(self):
         """Main task execution loop."""
@@ -92,13 +193,11 @@ class CheckMotorMovement(TaskBase):
 
             motor.user_readback.subscribe(self.make_user_readback_callback(motor_name))
 
-
+        self.seed_enable_event()
+        
         while self.running:
             # Only process if task is enabled
-            if not self.get_pv('ENABLE'):
-                self.logger.debug("Task disabled, skipping cycle")
-                
-                cothread.Sleep(1.0 / self.update_rate)
+            if not self.wait_enabled():
                 continue
             
             try:
@@ -111,61 +210,69 @@ class CheckMotorMovement(TaskBase):
                 self.set_message(f"Error: {str(e)}")
             
             # Sleep based on update rate
-            cothread.Sleep(1.0 / self.update_rate)
+            cothread.Sleep(self._period)
     
     def _monitor_motors(self):
         """Monitor motors and detect movement."""
-        for motor_name, motor in self.motors.items():
+        logger = self.logger
+        log_moving = logger.isEnabledFor(logging.DEBUG)
+        pvs = self.pvs
+        previous_moving_state = self.previous_moving_state
+        switch_armed = self._switch_armed
+        motor_pv_names = self._motor_pv_names
+        
+        updates = {}
+        is_moving_map = {}
+        for motor_name, (get_moving, get_position) in self._motor_accessors.items():
             try:
                 # Check if motor is moving
-                is_moving = False
-                position = None
-
-                # moving may be a property (standard Ophyd) or a method (custom TML motor)
-                if hasattr(motor, 'moving'):
-                    mv = getattr(motor, 'moving')
-                    is_moving = mv() if callable(mv) else bool(mv)
-
-                # position may be a property or a method
-                if hasattr(motor, 'position'):
-                    pos_attr = getattr(motor, 'position')
-                    position = pos_attr() if callable(pos_attr) else pos_attr
-                else:
-                    # Fallback to user_readback if available
-                    rb = getattr(motor, 'user_readback', None)
-                    try:
-                        position = rb.get() if rb is not None else None
-                    except Exception:
-                        position = None
+                is_moving = get_moving()
+                position = get_position()
                 
                 # Detect state change from not moving to moving
-                if is_moving and not self.previous_moving_state[motor_name]:
-                    self.logger.info(f"Motor {motor_name} started moving - Position: {position}")
+                if is_moving and not previous_moving_state[motor_name]:
+                    logger.info("Motor %s started moving - Position: %s", motor_name, position)
                 
                 # Detect state change from moving to not moving
-                elif not is_moving and self.previous_moving_state[motor_name]:
-                    self.logger.info(f"Motor {motor_name} stopped - Final position: {position}")
+                elif not is_moving and previous_moving_state[motor_name]:
+                    logger.info("Motor %s stopped - Final position: %s", motor_name, position)
                 
-                # Log position while moving
-                elif is_moving:
-                    self.logger.info(f"Motor {motor_name} is moving - Current position: {position}")
+                # Log position while moving (debug only)
+                elif is_moving and log_moving:
+                    logger.debug("Motor %s is moving - Current position: %s", motor_name, position)
                 
-                # Update tracking state
-                self.previous_moving_state[motor_name] = is_moving
+                # Update tracking state; a stopped motor re-arms the switchoff
+                previous_moving_state[motor_name] = is_moving
+                if not is_moving:
+                    switch_armed[motor_name] = True
                 
-                # Update PVs if they exist
-                pv_name = f"{motor_name}_POS"
-                if pv_name in self.pvs:
-                    self.set_pv(pv_name, position)
+                is_moving_map[motor_name] = is_moving
                 
-                pv_moving = f"{motor_name}_MOVING"
-                if pv_moving in self.pvs:
-                    self.set_pv(pv_moving, int(is_moving))
-
-                self.set_pv("MOVING", int(is_moving))
+                # Queue PV updates if they exist
+                pv_name, pv_moving = motor_pv_names[motor_name]
+                if pv_name in pvs:
+                    updates[pv_name] = position
+                if pv_moving in pvs:
+                    updates[pv_moving] = int(is_moving)
 
             except Exception as e:
                 self.logger.error(f"Error monitoring {motor_name}: {e}")
+        
+        # MOVING is set if any monitored motor is moving
+        if is_moving_map and "MOVING" in pvs:
+            updates["MOVING"] = int(any(is_moving_map.values()))
+        
+        self._set_pvs(updates)
+    
+    def _set_pvs(self, updates: dict):
+        """Write a batch of PV values, skipping those unchanged since the last write."""
+        pvs = self.pvs
+        last_pv_values = self._last_pv_values
+        for pv_name, value in updates.items():
+            if pv_name in last_pv_values and last_pv_values[pv_name] == value:
+                continue
+            pvs[pv_name].set(value)
+            last_pv_values[pv_name] = value
     
     def cleanup(self):
         """Cleanup when task stops."""
@@ -182,3 +289,5 @@ class CheckMotorMovement(TaskBase):
             value: New value
         """
         self.logger.debug(f"PV {pv_name} set to {value}")
+        if pv_name == 'ENABLE':
+            self.set_enabled(value)
@@ -2,17 +2,48 @@
 """
 Example data logging task that demonstrates file I/O and periodic operations.
 
-This task logs data to a file at regular intervals.
+This task logs data to a file at regular intervals. Log lines are queued by
+the task loop and written to disk by a background writer thread, so file I/O
+never blocks the cothread scheduler.
 """
 
+import os
+import queue
+import threading
+import time
 import cothread
 from datetime import datetime
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Any
 from task_base import TaskBase
+from enable_event import EnableEventMixin
 
+# Size of the log file write buffer (bytes), used when os.writev is unavailable
+LOG_BUFFER_SIZE = 128 * 1024
 
-class DataLoggingTask(TaskBase):
+# Gather writes are used where supported; batches are split at the iovec limit
+_HAVE_WRITEV = hasattr(os, 'writev')
+try:
+    _IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = -1
+# sysconf reports -1 when the platform sets no limit
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+# Longest sleep between log entries, bounding how late a stop request is seen (seconds)
+MAX_IDLE_SLEEP = 5.0
+
+# Sentinel put on the log queue to stop the writer thread
+_STOP = object()
+
+# Log line templates per log format: (timestamp, value1, value2, value3)
+_CSV_LINE = "{},{},{},{},OK\n".format
+_TEXT_LINE = "[{}] V1={}, V2={}, V3={}\n".format
+
+
+class DataLoggingTask(EnableEventMixin, TaskBase):
     """Example task that logs data to files."""
     
     def initialize(self):
@@ -23,6 +54,7 @@ class DataLoggingTask(TaskBase):
         self.log_interval = self.parameters.get('log_interval', 10.0)
         self.log_directory = Path(self.parameters.get('log_directory', './logs'))
         self.log_format = self.parameters.get('log_format', 'csv')
+        self.flush_period = self.parameters.get('flush_period', 5.0)
         
         # Create log directory if it doesn't exist
         self.log_directory.mkdir(parents=True, exist_ok=True)
@@ -35,57 +67,97 @@ class DataLoggingTask(TaskBase):
         # Initialize state
         self.log_count = 0
         self.last_log_time = cothread.GetTime()
+        self.init_enable_event()
+        
+        # Direct handles to the PVs used on every log entry
+        self._pv = SimpleNamespace(
+            value1=self.pvs['VALUE1'],
+            value2=self.pvs['VALUE2'],
+            value3=self.pvs['VALUE3'],
+            log_count=self.pvs['LOG_COUNT'],
+            last_log_time=self.pvs['LAST_LOG_TIME'],
+        )
         
-        # Write CSV header if applicable
+        # Second-resolution part of the last timestamp, reused within a second
+        self._ts_sec = None
+        self._ts_prefix = ''
+        
+        # Resolve the line formatter once
+        self._format_line = _CSV_LINE if self.log_format == 'csv' else _TEXT_LINE
+        
+        # Keep a single handle open for the lifetime of the task
+        self._fh = open(self.log_file_path, 'wb', buffering=LOG_BUFFER_SIZE)
+        
+        # Write CSV header if applicable; flushed so later gather writes
+        # on the raw descriptor land after it
         if self.log_format == 'csv':
-            with open(self.log_file_path, 'w') as f:
-                f.write("timestamp,value1,value2,value3,status\n")
+            self._fh.write(b"timestamp,value1,value2,value3,status\n")
+        self._fh.flush()
+        
+        # Start background writer fed by the log queue; write failures are
+        # passed back for reporting on the task cothread
+        self._log_queue = queue.Queue()
+        self._write_errors = queue.SimpleQueue()
+        self._writer_thread = threading.Thread(
+            target=self._drain, name=f"{self.name}-writer", daemon=True
+        )
+        self._writer_thread.start()
         
         self.logger.info(f"Logging to: {self.log_file_path}")
         self.logger.info(f"Log interval: {self.log_interval} seconds")
+        self.logger.info(f"Flush period: {self.flush_period} seconds")
     
     def run(self):
         """Main task execution loop."""
         self.logger.info("Starting data logging task execution")
         
+        self.seed_enable_event()
+        
+        next_log_time = self.last_log_time + self.log_interval
         while self.running:
+            self._report_write_errors()
+            
             # Only log if task is enabled
-            enabled = self.get_pv('ENABLE')
+            if not self.wait_enabled():
+                continue
             
             current_time = cothread.GetTime()
-            time_since_last_log = current_time - self.last_log_time
-            
-            if enabled and time_since_last_log >= self.log_interval:
+            if current_time >= next_log_time:
                 self._log_data()
                 self.last_log_time = current_time
+                next_log_time = current_time + self.log_interval
                 # increment cycle counter when a log event occurs
                 self.step_cycle()
             
-            # Sleep for a short time
-            cothread.Sleep(0.5)
+            # Sleep until the next log entry is due
+            delay = next_log_time - cothread.GetTime()
+            cothread.Sleep(min(max(0.01, delay), MAX_IDLE_SLEEP))
+    
+    def _report_write_errors(self):
+        """Report failures from the writer thread through the task status."""
+        while not self._write_errors.empty():
+            e, lost = self._write_errors.get_nowait()
+            self.set_status('ERROR')
+            self.set_message(f"Error: {str(e)} ({lost} log entries lost)")
     
     def _log_data(self):
         """Log current data to file."""
         try:
             # Read values to log
-            value1 = self.get_pv('VALUE1') or 0.0
-            value2 = self.get_pv('VALUE2') or 0.0
-            value3 = self.get_pv('VALUE3') or 0.0
+            pv = self._pv
+            value1 = pv.value1.get() or 0.0
+            value2 = pv.value2.get() or 0.0
+            value3 = pv.value3.get() or 0.0
             
-            timestamp = datetime.now().isoformat()
+            timestamp = self._timestamp()
             
-            # Write to file based on format
-            if self.log_format == 'csv':
-                with open(self.log_file_path, 'a') as f:
-                    f.write(f"{timestamp},{value1},{value2},{value3},OK\n")
-            else:
-                with open(self.log_file_path, 'a') as f:
-                    f.write(f"[{timestamp}] V1={value1}, V2={value2}, V3={value3}\n")
+            # Queue line for the writer thread
+            self._log_queue.put_nowait(self._format_line(timestamp, value1, value2, value3))
             
             # Update counters
             self.log_count += 1
-            self.set_pv('LOG_COUNT', self.log_count)
-            self.set_pv('LAST_LOG_TIME', timestamp)
+            pv.log_count.set(self.log_count)
+            pv.last_log_time.set(timestamp)
             
             self.logger.debug(f"Logged entry {self.log_count}")
             
@@ -94,9 +166,73 @@ class DataLoggingTask(TaskBase):
             self.set_status('ERROR')
             self.set_message(f"Error: {str(e)}")
     
+    def _timestamp(self) -> str:
+        """Return the local time in ISO 8601 format with millisecond resolution."""
+        now = time.time()
+        sec = int(now)
+        if sec != self._ts_sec:
+            self._ts_sec = sec
+            self._ts_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(sec))
+        return f"{self._ts_prefix}.{int((now - sec) * 1000):03d}"
+    
+    def _drain(self):
+        """Writer thread: collect queued log lines and write them out periodically."""
+        next_flush = None
+        pending = []
+        stop = False
+        while not stop:
+            # Block until a line is queued; once lines are pending, only
+            # until they are due (flush_period <= 0 writes every batch)
+            timeout = max(0.0, next_flush - time.monotonic()) if pending else None
+            try:
+                item = self._log_queue.get(timeout=timeout)
+                # Collect everything already queued
+                while True:
+                    if item is _STOP:
+                        stop = True
+                        break
+                    if not pending:
+                        next_flush = time.monotonic() + self.flush_period
+                    pending.append(item.encode())
+                    item = self._log_queue.get_nowait()
+            except queue.Empty:
+                pass
+            
+            if pending and (stop or time.monotonic() >= next_flush):
+                try:
+                    self._write_lines(pending)
+                except Exception as e:
+                    self.logger.error(f"Error writing log file: {e}", exc_info=True)
+                    self._write_errors.put((e, len(pending)))
+                pending = []
+    
+    def _write_lines(self, lines: list):
+        """Write encoded log lines, with one gather write per iovec-sized chunk."""
+        if not _HAVE_WRITEV:
+            self._fh.write(b"".join(lines))
+            self._fh.flush()
+            return
+        
+        fd = self._fh.fileno()
+        for start in range(0, len(lines), _IOV_MAX):
+            chunk = lines[start:start + _IOV_MAX]
+            written = os.writev(fd, chunk)
+            total = sum(map(len, chunk))
+            if written < total:
+                # Finish a short write
+                rest = memoryview(b"".join(chunk))[written:]
+                while rest:
+                    rest = rest[os.write(fd, rest):]
+    
     def cleanup(self):
         """Cleanup when task stops."""
         self.logger.info("Cleaning up data logging task")
+        
+        # Stop the writer thread, letting it write out pending lines
+        self._log_queue.put(_STOP)
+        self._writer_thread.join()
+        self._fh.close()
+        
         self.set_status('END')
         self.set_message('Stopped')
         self.logger.info(f"Total log entries: {self.log_count}")
@@ -109,7 +245,10 @@ class DataLoggingTask(TaskBase):
             pv_name: Name of the PV that was written
             value: New value
         """
-        if pv_name == 'RESET_COUNT':
+        if pv_name == 'ENABLE':
+            self.set_enabled(value)
+        
+        elif pv_name == 'RESET_COUNT':
             if value:
                 self.logger.info("Resetting log count")
                 self.log_count = 0
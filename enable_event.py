@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+ENABLE handling shared by the beamline controller tasks.
+
+Instead of reading the ENABLE PV on every cycle, a task keeps its state in a
+cothread.Event that is signalled from handle_pv_write, and its loop blocks on
+the event while the task is disabled.
+"""
+
+import cothread
+from typing import Any
+
+# While disabled, wake up this often to notice a stop request (seconds)
+DISABLED_WAKEUP_PERIOD = 1.0
+
+
+class EnableEventMixin:
+    """Mixin for TaskBase subclasses that track ENABLE with an event."""
+
+    def init_enable_event(self):
+        """Create the ENABLE event; call from initialize()."""
+        self._enable_event = cothread.Event(auto_reset=False)
+
+    def seed_enable_event(self):
+        """Pick up the initial ENABLE state; call at the start of run()."""
+        if self.get_pv('ENABLE'):
+            self._enable_event.Signal()
+
+    def set_enabled(self, value: Any):
+        """Update the ENABLE event; call from handle_pv_write on ENABLE writes."""
+        if value:
+            self._enable_event.Signal()
+        else:
+            self._enable_event.Reset()
+
+    def wait_enabled(self) -> bool:
+        """Block until ENABLE is set; return False if the wait timed out."""
+        try:
+            self._enable_event.Wait(DISABLED_WAKEUP_PERIOD)
+            return True
+        except cothread.Timedout:
+            self.logger.debug("Task disabled, skipping cycle")
+            return False
@@ -9,14 +9,34 @@ This task demonstrates:
 - Implementing interlocks
 """
 
+import math
+import time
 import cothread
 import numpy as np
+from collections import deque
+from types import SimpleNamespace
 from typing import Any
-from epics import caget, caput
+from epics import PV, caput, poll
 from task_base import TaskBase
+from enable_event import EnableEventMixin
 
+# Timeout for connecting to and writing RedPitaya settings (seconds)
+REDPITAYA_INIT_TIMEOUT = 2.0
 
-class LaserSynchTask(TaskBase):
+# RedPitaya settings applied at startup, in order
+REDPITAYA_SETTINGS = [
+    ("RESET_ACQ_CMD", "1"),
+    ("ACQ_TRIGGER_SRC_CMD", "NOW"),
+    ("IN2_GAIN_CMD", "High"),
+    ("ACQ_AVERAGING_CMD", "Off"),
+    ("DIGITAL_P4_DIR_CMD", "1"),
+    ("DIGITAL_P4_STATE_CMD", "0"),
+    ("OUT1_FREQ_SP", "0"),
+    ("OUT1_ENABLE_CMD", "1"),
+]
+
+
+class LaserSynchTask(EnableEventMixin, TaskBase):
     """Laser synchronization control task."""
     
     def initialize(self):
@@ -25,18 +45,73 @@ class LaserSynchTask(TaskBase):
         
         # Get task parameters
         self.loop_period = self.parameters.get('loop_period', 0.2)
-        self.avg_num = self.parameters.get('avg_num', 10)
-        self.interlock_buff_length = self.parameters.get('interlock_buff_length', 10)
+        # The running average needs at least one sample in its window
+        self.avg_num = max(1, int(self.parameters.get('avg_num', 10)))
+        # An empty interlock window would trip on every cycle
+        self.interlock_buff_length = max(1, int(self.parameters.get('interlock_buff_length', 10)))
         
         # Get external PV names from parameters
         self.prefix_redpitaya = self.parameters.get('prefix_redpitaya', '')
         self.prefix_motor = self.parameters.get('prefix_motor', '')
         self.pv_laser_amp_llrf = self.parameters.get('pv_laser_amp_llrf', '')
         
-        # Initialize buffers
-        self.corr_buff = []
-        self.err_buff = []
-        self.laser_amp_buff = []
+        # Initialize sliding-window buffers; the interlock buffers are numpy
+        # ring buffers whose write cursors count the samples written so far
+        self.corr_buff = deque(maxlen=self.avg_num)
+        self.err_buff = np.zeros(self.interlock_buff_length)
+        self.laser_amp_buff = np.zeros(self.interlock_buff_length)
+        self._err_i = 0
+        self._amp_i = 0
+        
+        # Running sum of corr_buff
+        self._corr_sum = 0.0
+        
+        # Interlock bitmasks over the last interlock_buff_length samples:
+        # bit i is set when sample i (0 = newest) is past its threshold
+        self._full_mask = (1 << self.interlock_buff_length) - 1
+        self._err_mask = 0
+        self._amp_mask = 0
+        self._pll_err_tsh = None
+        self._laser_amp_tsh = None
+        
+        # Averaging window over the correction waveform, rebuilt from
+        # AVG_START/AVG_STOP when None
+        self._avg_slice = None
+        
+        # Monitored external PVs: values are cached locally by CA subscriptions
+        self._pv_pll = None
+        self._pv_in1 = None
+        self._pv_in2 = None
+        self._pv_laser_amp = None
+        # Output PVs written from the control cycle
+        self._pv_start_acq = None
+        self._pv_pll_cmd = None
+        self._pv_motor_rlv = None
+        if self.prefix_redpitaya:
+            self._pv_pll = PV(f"{self.prefix_redpitaya}:DIGITAL_P4_STATE_STATUS", auto_monitor=True)
+            self._pv_in1 = PV(f"{self.prefix_redpitaya}:IN1_DATA_MONITOR", auto_monitor=True)
+            self._pv_in2 = PV(f"{self.prefix_redpitaya}:IN2_DATA_MONITOR", auto_monitor=True)
+            self._pv_start_acq = PV(f"{self.prefix_redpitaya}:START_SS_ACQ_CMD")
+            self._pv_pll_cmd = PV(f"{self.prefix_redpitaya}:DIGITAL_P4_STATE_CMD")
+        if self.pv_laser_amp_llrf:
+            self._pv_laser_amp = PV(self.pv_laser_amp_llrf, auto_monitor=True)
+        if self.prefix_motor:
+            self._pv_motor_rlv = PV(f"{self.prefix_motor}:m0.RLV")
+        
+        self.init_enable_event()
+        
+        # Direct handles to the task PVs used on every cycle
+        self._pv = SimpleNamespace(
+            pll_on=self.pvs['PLL_ON'],
+            avg_reset=self.pvs['AVG_RESET'],
+            corr=self.pvs['CORR'],
+            corr_avg=self.pvs['CORR_AVG'],
+            pll_err_tsh=self.pvs['PLL_ERR_TSH'],
+            laser_amp_tsh=self.pvs['LASER_AMP_TSH'],
+            tracking_on=self.pvs['TRACKING_ON'],
+            tracking_tsh=self.pvs['TRACKING_TSH'],
+            tracking_step=self.pvs['TRACKING_STEP'],
+        )
         
         # Initialize external devices
         if self.prefix_redpitaya:
@@ -51,14 +126,21 @@ class LaserSynchTask(TaskBase):
     def _init_redpitaya(self):
         """Initialize RedPitaya settings."""
         try:
-            caput(f"{self.prefix_redpitaya}:RESET_ACQ_CMD", "1")
-            caput(f"{self.prefix_redpitaya}:ACQ_TRIGGER_SRC_CMD", "NOW")
-            caput(f"{self.prefix_redpitaya}:IN2_GAIN_CMD", "High")
-            caput(f"{self.prefix_redpitaya}:ACQ_AVERAGING_CMD", "Off")
-            caput(f"{self.prefix_redpitaya}:DIGITAL_P4_DIR_CMD", "1")
-            caput(f"{self.prefix_redpitaya}:DIGITAL_P4_STATE_CMD", "0")
-            caput(f"{self.prefix_redpitaya}:OUT1_FREQ_SP", "0")
-            caput(f"{self.prefix_redpitaya}:OUT1_ENABLE_CMD", "1")
+            # Create all channels first so they connect in parallel
+            pvs = [PV(f"{self.prefix_redpitaya}:{suffix}") for suffix, _ in REDPITAYA_SETTINGS]
+            
+            # Issue all writes without waiting, then wait once for completion
+            for pv, (_, value) in zip(pvs, REDPITAYA_SETTINGS):
+                if not pv.wait_for_connection(timeout=REDPITAYA_INIT_TIMEOUT):
+                    raise TimeoutError(f"{pv.pvname} not connected")
+                pv.put(value, use_complete=True)
+            
+            deadline = time.time() + REDPITAYA_INIT_TIMEOUT
+            while not all(pv.put_complete for pv in pvs):
+                if time.time() > deadline:
+                    pending = [pv.pvname for pv in pvs if not pv.put_complete]
+                    raise TimeoutError(f"Writes not completed: {pending}")
+                poll(evt=0.01)
             self.logger.info("RedPitaya initialized")
         except Exception as e:
             self.logger.error(f"Failed to initialize RedPitaya: {e}")
@@ -75,11 +157,11 @@ class LaserSynchTask(TaskBase):
         """Main task execution loop."""
         self.logger.info("Starting laser synch task execution")
         
+        self.seed_enable_event()
+        
         while self.running:
             # Only process if task is enabled
-            if not self.get_pv('ENABLE'):
-                self.logger.debug("Task disabled, skipping cycle")
-                cothread.Sleep(self.loop_period)
+            if not self.wait_enabled():
                 continue
             
             try:
@@ -96,91 +178,133 @@ class LaserSynchTask(TaskBase):
     
     def _process_cycle(self):
         """Process one control cycle."""
+        pv = self._pv
+        
         # Read PLL status from RedPitaya
         pll_on = False
         if self.prefix_redpitaya:
-            pll_on = caget(f"{self.prefix_redpitaya}:DIGITAL_P4_STATE_STATUS")
+            pll_on = self._pv_pll.get(use_monitor=True)
         
         # Update PLL status PV
-        self.set_pv('PLL_ON', int(pll_on))
+        pv.pll_on.set(int(pll_on))
         
         # Reset average if requested
-        if self.get_pv('AVG_RESET'):
-            self.corr_buff = []
-            self.set_pv('AVG_RESET', 0)
+        if pv.avg_reset.get():
+            self.corr_buff.clear()
+            self._corr_sum = 0.0
+            pv.avg_reset.set(0)
             self.logger.info("Average buffer reset")
         
         # Acquire correction waveform
         if self.prefix_redpitaya:
-            caput(f"{self.prefix_redpitaya}:START_SS_ACQ_CMD", 1)
-            wave_corr = caget(f"{self.prefix_redpitaya}:IN2_DATA_MONITOR")
+            self._pv_start_acq.put(1)
+            wave_corr = self._pv_in2.get(use_monitor=True)
             
             if wave_corr is not None:
                 # Calculate average over specified range
-                avg_start = int(self.get_pv('AVG_START') or 0)
-                avg_stop = int(self.get_pv('AVG_STOP') or len(wave_corr))
-                
-                corr_value = np.mean(wave_corr[avg_start:avg_stop+1])
-                self.set_pv('CORR', corr_value)
+                if self._avg_slice is None:
+                    self._avg_slice = self._build_avg_slice()
                 
-                # Update correction buffer
-                self.corr_buff.append(corr_value)
-                if len(self.corr_buff) > self.avg_num:
-                    self.corr_buff.pop(0)
-                
-                # Update average
-                corr_avg = np.mean(self.corr_buff)
-                self.set_pv('CORR_AVG', corr_avg)
+                segment = wave_corr[self._avg_slice]
+                if len(segment) == 0:
+                    # Window outside the waveform: skip the correction this
+                    # cycle but still run the interlock below
+                    self.logger.debug(f"Empty averaging window {self._avg_slice} for waveform of length {len(wave_corr)}")
+                else:
+                    corr_value = float(np.add.reduce(segment)) / len(segment)
+                    pv.corr.set(corr_value)
+                    
+                    # Update correction buffer and its running average
+                    evicted = self.corr_buff[0] if len(self.corr_buff) == self.corr_buff.maxlen else 0.0
+                    self.corr_buff.append(corr_value)
+                    if math.isfinite(evicted) and math.isfinite(corr_value):
+                        self._corr_sum += corr_value - evicted
+                    else:
+                        # A NaN/inf would stick in the running sum; rebuild it
+                        # from the buffer so it recovers once evicted
+                        self._corr_sum = float(sum(self.corr_buff))
+                    corr_avg = self._corr_sum / len(self.corr_buff)
+                    pv.corr_avg.set(corr_avg)
+        
+        # Rebuild interlock masks if a threshold changed
+        pll_err_tsh = pv.pll_err_tsh.get() or 1.0
+        laser_amp_tsh = pv.laser_amp_tsh.get() or 0.0
+        if pll_err_tsh != self._pll_err_tsh or laser_amp_tsh != self._laser_amp_tsh:
+            self._update_thresholds(pll_err_tsh, laser_amp_tsh)
         
         # Update laser amplitude buffer
         if self.pv_laser_amp_llrf:
-            laser_amp = caget(self.pv_laser_amp_llrf)
+            laser_amp = self._pv_laser_amp.get(use_monitor=True)
             if laser_amp is not None:
-                self.laser_amp_buff.append(laser_amp)
-                if len(self.laser_amp_buff) > self.interlock_buff_length:
-                    self.laser_amp_buff.pop(0)
+                self.laser_amp_buff[self._amp_i % self.interlock_buff_length] = laser_amp
+                self._amp_i += 1
+                self._amp_mask = ((self._amp_mask << 1) | bool(laser_amp < laser_amp_tsh)) & self._full_mask
         
         # Update error buffer
         if self.prefix_redpitaya:
-            wave_err = caget(f"{self.prefix_redpitaya}:IN1_DATA_MONITOR")
+            wave_err = self._pv_in1.get(use_monitor=True)
             if wave_err is not None:
-                self.err_buff.append(np.max(wave_err))
-                if len(self.err_buff) > self.interlock_buff_length:
-                    self.err_buff.pop(0)
+                err_max = np.max(wave_err)
+                self.err_buff[self._err_i % self.interlock_buff_length] = err_max
+                self._err_i += 1
+                self._err_mask = ((self._err_mask << 1) | bool(err_max > pll_err_tsh)) & self._full_mask
         
         # Implement interlock logic
         if pll_on:
-            pll_err_tsh = self.get_pv('PLL_ERR_TSH') or 1.0
-            laser_amp_tsh = self.get_pv('LASER_AMP_TSH') or 0.0
-            
-            err_count = sum(1 for e in self.err_buff if e > pll_err_tsh)
-            amp_count = sum(1 for a in self.laser_amp_buff if a < laser_amp_tsh)
-            
-            if err_count == self.interlock_buff_length or amp_count == self.interlock_buff_length:
+            if self._err_mask == self._full_mask or self._amp_mask == self._full_mask:
                 if self.prefix_redpitaya:
-                    caput(f"{self.prefix_redpitaya}:DIGITAL_P4_STATE_CMD", "0")
+                    self._pv_pll_cmd.put("0")
                 self.logger.warning("Interlock triggered - PLL turned OFF")
                 pll_on = False
         
         # Disable tracking if PLL is off
         if not pll_on:
-            self.set_pv('TRACKING_ON', 0)
+            pv.tracking_on.set(0)
         
         # Perform tracking if enabled
-        tracking_on = self.get_pv('TRACKING_ON')
+        tracking_on = pv.tracking_on.get()
         if tracking_on:
-            corr_avg = self.get_pv('CORR_AVG') or 0.0
-            tracking_tsh = self.get_pv('TRACKING_TSH') or 0.1
-            tracking_step = self.get_pv('TRACKING_STEP') or 0.01
+            corr_avg = pv.corr_avg.get() or 0.0
+            tracking_tsh = pv.tracking_tsh.get() or 0.1
+            tracking_step = pv.tracking_step.get() or 0.01
             
             if abs(corr_avg) > tracking_tsh and self.prefix_motor:
                 step = tracking_step if corr_avg > 0 else -tracking_step
-                caput(f"{self.prefix_motor}:m0.RLV", str(step))
+                self._pv_motor_rlv.put(str(step))
                 self.logger.debug(f"Tracking: moving motor by {step}")
         
         # Update message with status
         self.set_message(f"PLL:{'ON' if pll_on else 'OFF'} Track:{'ON' if tracking_on else 'OFF'}")
     
+    def _build_avg_slice(self) -> slice:
+        """Build the averaging window slice from AVG_START/AVG_STOP."""
+        avg_start = int(self.get_pv('AVG_START') or 0)
+        avg_stop = int(self.get_pv('AVG_STOP') or 0)
+        # AVG_STOP unset (0) means average up to the end of the waveform
+        return slice(avg_start, avg_stop + 1 if avg_stop else None)
+    
+    def _update_thresholds(self, pll_err_tsh: float, laser_amp_tsh: float):
+        """Store new interlock thresholds and rebuild the masks against them."""
+        self._pll_err_tsh = pll_err_tsh
+        self._laser_amp_tsh = laser_amp_tsh
+        self._err_mask = self._build_mask(self._ordered(self.err_buff, self._err_i) > pll_err_tsh)
+        self._amp_mask = self._build_mask(self._ordered(self.laser_amp_buff, self._amp_i) < laser_amp_tsh)
+    
+    @staticmethod
+    def _ordered(buff: np.ndarray, cursor: int) -> np.ndarray:
+        """Return the filled part of a ring buffer, oldest sample first."""
+        if cursor < len(buff):
+            return buff[:cursor]
+        return np.roll(buff, -(cursor % len(buff)))
+    
+    @staticmethod
+    def _build_mask(flags: np.ndarray) -> int:
+        """Pack per-sample flags (oldest first) into a mask with bit 0 = newest."""
+        mask = 0
+        for flag in flags.tolist():
+            mask = (mask << 1) | flag
+        return mask
+    
     def cleanup(self):
         """Cleanup when task stops."""
         self.logger.info("Cleaning up laser synch task")
@@ -188,10 +312,15 @@ class LaserSynchTask(TaskBase):
         # Turn off PLL
         if self.prefix_redpitaya:
             try:
-                caput(f"{self.prefix_redpitaya}:DIGITAL_P4_STATE_CMD", "0")
+                self._pv_pll_cmd.put("0")
             except Exception as e:
                 self.logger.error(f"Error turning off PLL: {e}")
         
+        # Drop the monitor subscriptions
+        for pv in (self._pv_pll, self._pv_in1, self._pv_in2, self._pv_laser_amp):
+            if pv is not None:
+                pv.disconnect()
+        
         self.set_status('END')
         self.set_message('Stopped')
     
@@ -203,9 +332,13 @@ class LaserSynchTask(TaskBase):
             pv_name: Name of the PV that was written
             value: New value
         """
-        if pv_name == 'AVG_RESET' and value:
+        if pv_name == 'ENABLE':
+            self.set_enabled(value)
+        elif pv_name == 'AVG_RESET' and value:
             self.logger.info("Average reset requested")
         elif pv_name == 'TRACKING_ON':
             self.logger.info(f"Tracking {'enabled' if value else 'disabled'}")
         elif pv_name in ['AVG_START', 'AVG_STOP']:
             self.logger.debug(f"{pv_name} updated to {value}")
+            # Rebuild the averaging window on the next cycle
+            self._avg_slice = None
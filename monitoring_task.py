@@ -7,11 +7,21 @@ and updates output PVs accordingly.
 """
 
 import cothread
+from types import SimpleNamespace
 from typing import Any
 from task_base import TaskBase
+from enable_event import EnableEventMixin
 
+# Supported calculations, keyed by the 'calculation_type' parameter
+_CALCULATIONS = {
+    'average': lambda a, b, c: (a + b + c) / 3.0,
+    'sum': lambda a, b, c: a + b + c,
+    'max': max,
+    'min': min,
+}
 
-class MonitoringTask(TaskBase):
+
+class MonitoringTask(EnableEventMixin, TaskBase):
     """Example task that monitors values and computes statistics."""
     
     def initialize(self):
@@ -26,8 +36,22 @@ class MonitoringTask(TaskBase):
         beamline = self.beamline_config.get('beamline', 'unknown')
         self.logger.info(f"Running on beamline: {beamline}")
         
+        # Resolve the calculation once; unknown types yield 0.0
+        self._calculate = _CALCULATIONS.get(self.calculation_type, lambda a, b, c: 0.0)
+        
         # Initialize internal state
         self.sample_count = 0
+        self._period = 1.0 / float(self.update_rate)
+        self.init_enable_event()
+        
+        # Direct handles to the PVs used on every cycle
+        self._pv = SimpleNamespace(
+            input1=self.pvs['INPUT1'],
+            input2=self.pvs['INPUT2'],
+            input3=self.pvs['INPUT3'],
+            output_result=self.pvs['OUTPUT_RESULT'],
+            sample_count=self.pvs['SAMPLE_COUNT'],
+        )
         
         self.logger.info(f"Update rate: {self.update_rate} Hz")
         self.logger.info(f"Calculation type: {self.calculation_type}")
@@ -36,46 +60,38 @@ class MonitoringTask(TaskBase):
         """Main task execution loop."""
         self.logger.info("Starting monitoring task execution")
         
+        self.seed_enable_event()
+        
         while self.running:
             # Only process if task is enabled
-            enabled = self.get_pv('ENABLE')
+            if not self.wait_enabled():
+                continue
             
-            if enabled:
-                self._process_cycle()
-                # increment cycle counter when active
-                self.step_cycle()
-            else:
-                self.logger.debug("Task disabled, skipping cycle")
+            self._process_cycle()
+            # increment cycle counter when active
+            self.step_cycle()
             
             # Sleep based on update rate
-            cothread.Sleep(1.0 / self.update_rate)
+            cothread.Sleep(self._period)
     
     def _process_cycle(self):
         """Process one monitoring cycle."""
         try:
             # Read input PVs
-            input1 = self.get_pv('INPUT1') or 0.0
-            input2 = self.get_pv('INPUT2') or 0.0
-            input3 = self.get_pv('INPUT3') or 0.0
+            pv = self._pv
+            input1 = pv.input1.get() or 0.0
+            input2 = pv.input2.get() or 0.0
+            input3 = pv.input3.get() or 0.0
             
             # Perform calculation based on type
-            if self.calculation_type == 'average':
-                result = (input1 + input2 + input3) / 3.0
-            elif self.calculation_type == 'sum':
-                result = input1 + input2 + input3
-            elif self.calculation_type == 'max':
-                result = max(input1, input2, input3)
-            elif self.calculation_type == 'min':
-                result = min(input1, input2, input3)
-            else:
-                result = 0.0
+            result = self._calculate(input1, input2, input3)
             
             # Update output PVs
-            self.set_pv('OUTPUT_RESULT', result)
+            pv.output_result.set(result)
             
             # Update sample count
             self.sample_count += 1
-            self.set_pv('SAMPLE_COUNT', self.sample_count)
+            pv.sample_count.set(self.sample_count)
             
             # Update status and message
             self.set_message(f"Processed {self.sample_count} samples")
@@ -101,7 +117,10 @@ class MonitoringTask(TaskBase):
             pv_name: Name of the PV that was written
             value: New value
         """
-        if pv_name == 'RESET':
+        if pv_name == 'ENABLE':
+            self.set_enabled(value)
+        
+        elif pv_name == 'RESET':
             if value:
                 self.logger.info("Resetting sample count")
                 self.sample_count = 0